@@ -1,9 +1,21 @@
 import streamlit as st
 import pandas as pd
+import io
+import numpy as np
 import gspread
-from gspread_dataframe import get_as_dataframe, set_with_dataframe
-from datetime import datetime, timezone
-from dateutil import tz
+import hashlib
+import random
+import threading
+import time
+from datetime import datetime
+from zoneinfo import ZoneInfo
+from pathlib import Path
+from google.cloud import storage
+
+# Derived frames share memory with their parent until written to
+# (always on from pandas 3.0, where the option is deprecated)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
 
 def _full_height(n_rows: int, row_h: int = 38, header_h: int = 38, max_h: int = 2200) -> int:
     """Return a height tall enough to show all rows without a scroll bar."""
@@ -15,7 +27,11 @@ def _full_height(n_rows: int, row_h: int = 38, header_h: int = 38, max_h: int =
 st.set_page_config(page_title="Inventory Dashboard", layout="wide", page_icon="📦")
 st.title("Inventory Dashboard")
 
-LOCAL_TZ = tz.gettz("America/Chicago")  # change if needed
+LOCAL_TZ = ZoneInfo("America/Chicago")  # change if needed
+
+def _now_str() -> str:
+    """Current local time as an ISO-8601 string, e.g. 2024-05-01T14:03:27-05:00."""
+    return datetime.now(LOCAL_TZ).isoformat(timespec="seconds")
 
 # ---- Secrets / Settings (set in Streamlit Cloud: Settings → Secrets) ----
 # Required:
@@ -27,135 +43,322 @@ LOCAL_TZ = tz.gettz("America/Chicago")  # change if needed
 #   EDITOR_PIN (PIN for editor unlock)
 #   ORDERS_SHEET_NAME (default "Orders")
 #   MAP_SHEET_NAME (default "Map")
+#   SNAPSHOT_BUCKET (GCS bucket the read-only inventory snapshot is published to)
+#   SNAPSHOT_MAX_AGE (seconds a snapshot is served before the read-only view reads Sheets; default 600)
+#   RECORD_REPLAY (true to record Sheets responses on disk and offer read-only Replay mode)
 SHEET_ID = st.secrets["SHEET_ID"]
 WORKSHEET_NAME = st.secrets.get("WORKSHEET_NAME", "Sheet1")
 META_SHEET_NAME = st.secrets.get("META_SHEET_NAME", "Meta")
 ORDERS_SHEET_NAME = st.secrets.get("ORDERS_SHEET_NAME", "Orders")
 MAP_SHEET_NAME = st.secrets.get("MAP_SHEET_NAME", "Map")
 EDITOR_PIN = st.secrets.get("EDITOR_PIN", None)
+SNAPSHOT_BUCKET = st.secrets.get("SNAPSHOT_BUCKET", None)
+SNAPSHOT_BLOB = "inv/latest.parquet"
+# The snapshot only changes when the app saves; cap its age so edits made directly in the sheet
+# still reach the read-only view
+SNAPSHOT_MAX_AGE = int(st.secrets.get("SNAPSHOT_MAX_AGE", 600))
+
+# Record/replay for demos: the last Sheets responses are recorded on disk and Replay mode
+# renders from them. Live reads never use the recording; it is not a read cache.
+RECORD_REPLAY = bool(st.secrets.get("RECORD_REPLAY", False))
+RECORDING_DIR = Path.home() / ".cache" / "inventory"
 
 # =========================
 # Google Sheets helpers
 # =========================
+INVENTORY_COLS = ["Item", "SKU", "OnHand", "MinLevel"]
+ORDERS_COLS = ["OrderId","OrderName","LineId","SKU","Qty","Completed","CompletedAt","CreatedDate","Note"]
+MAP_COLS = ["JamlinerLength","BalanceSize","UnitsPerOrder"]
+# Cell values that count as Completed (checkbox cells come back as TRUE/FALSE)
+TRUTHY = {v: True for v in [True, 1, "1", "TRUE", "True", "true", "YES", "Yes", "yes", "Y", "y", "T", "t"]}
+
+def _a1(sheet: str, cells: str) -> str:
+    """A1 range on `sheet`, with the tab name quoted so any title (spaces, quotes) is valid."""
+    return "'" + sheet.replace("'", "''") + "'!" + cells
+
+class TokenBucket:
+    """Process-wide token bucket: refills `rate` tokens/sec up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.stamp = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+
+    def acquire(self):
+        """Take one token, sleeping just long enough for one to refill if the bucket is empty."""
+        with self.lock:
+            self._refill()
+            if self.tokens < 1:
+                time.sleep(max(0.0, (1 - self.tokens) / self.rate))
+                self._refill()
+            self.tokens -= 1
+
+# Sheets quota is 60 read requests / minute / user
+_bucket = TokenBucket(rate=60 / 60.0, capacity=60)
+MAX_RETRIES = 5
+
+def _call(fn, *args, **kwargs):
+    """Run one Sheets API call through the rate limiter, retrying 429s with exponential backoff."""
+    for attempt in range(MAX_RETRIES):
+        _bucket.acquire()
+        try:
+            return fn(*args, **kwargs)
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code != 429 or attempt == MAX_RETRIES - 1:
+                raise
+            time.sleep(min(2 ** attempt + random.random(), 32))
+
+@st.cache_resource
 def _gc():
     return gspread.service_account_from_dict(st.secrets["gcp_service_account"])
 
-@st.cache_data(ttl=30)
-def read_inventory_sheet() -> pd.DataFrame:
-    gc = _gc()
-    sh = gc.open_by_key(SHEET_ID)
-    ws = sh.worksheet(WORKSHEET_NAME)
-    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
+@st.cache_resource
+def _sheet():
+    """Open the spreadsheet once per process and bootstrap any missing tabs."""
+    sh = _call(_gc().open_by_key, SHEET_ID)
+    existing = {ws.title for ws in _call(sh.worksheets)}
+    if ORDERS_SHEET_NAME not in existing:
+        ws = _call(sh.add_worksheet, title=ORDERS_SHEET_NAME, rows=1000, cols=9)
+        _call(ws.update, "A1:I1", [ORDERS_COLS])
+    if MAP_SHEET_NAME not in existing:
+        # bootstrap an empty Map sheet with headers
+        ws = _call(sh.add_worksheet, title=MAP_SHEET_NAME, rows=100, cols=3)
+        _call(ws.update, "A1:C1", [MAP_COLS])
+    if META_SHEET_NAME not in existing:
+        meta = _call(sh.add_worksheet, title=META_SHEET_NAME, rows=10, cols=3)
+        _call(meta.update, "A1:B2", [["Key", "Value"], ["last_updated", ""]])
+    return sh
+
+# ===== Recorded Sheets responses (Replay mode) =====
+def _recording_key(rng: str) -> str:
+    return hashlib.sha256(f"{SHEET_ID}|{rng}".encode()).hexdigest()
+
+def _recording_get(key: str) -> list[list] | None:
+    """Return the recorded rows for `key`, or None if nothing was recorded."""
+    path = RECORDING_DIR / f"{key}.parquet"
+    if not path.exists():
+        return None
+    return pd.read_parquet(path).fillna("").values.tolist()
 
+def _recording_put(key: str, rows: list[list]):
+    try:
+        RECORDING_DIR.mkdir(parents=True, exist_ok=True)
+        raw = pd.DataFrame(rows).rename(columns=str).astype("string")
+        raw.to_parquet(RECORDING_DIR / f"{key}.parquet", index=False)
+    except Exception:
+        pass  # recording is best-effort
+
+def _recording_drop(key: str):
+    try:
+        (RECORDING_DIR / f"{key}.parquet").unlink(missing_ok=True)
+    except OSError:
+        pass  # never fail a save that already reached the sheet
+
+def _frame(rows: list[list]) -> pd.DataFrame:
+    """Build a DataFrame from a values range (header row first). Blank cells become NaN."""
+    if not rows:
+        return pd.DataFrame()
+    header, body = rows[0], rows[1:]
+    width = len(header)
+    # The API trims trailing blank cells, so pad every row back to the header width
+    body = [(r + [""] * width)[:width] for r in body]
+    df = pd.DataFrame(body, columns=header)
+    return df.where(df != "")
+
+def _clean_inventory(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize expected columns
-    for col in ["Item", "SKU", "OnHand", "MinLevel"]:
+    for col in INVENTORY_COLS:
         if col not in df.columns:
             df[col] = "" if col in ["Item", "SKU"] else 0
 
-    df = df[["Item", "SKU", "OnHand", "MinLevel"]].dropna(how="all")
+    df = df[INVENTORY_COLS].dropna(how="all")
+
+    # Unformatted reads hand back numeric-looking labels as numbers; keep them as text
+    for col in ["Item", "SKU"]:
+        df[col] = df[col].fillna("").astype(str)
 
     # Clean numerics
     for col in ["OnHand", "MinLevel"]:
         df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
 
     df["LowStock"] = df["OnHand"] <= df["MinLevel"]
-    return df
-
-def write_inventory_sheet(df: pd.DataFrame):
-    """Writes inventory and updates Meta!B2 with timestamp."""
-    gc = _gc()
-    sh = gc.open_by_key(SHEET_ID)
-
-    # Inventory
-    ws = sh.worksheet(WORKSHEET_NAME)
-    out = df[["Item", "SKU", "OnHand", "MinLevel"]].copy()
-    ws.clear()
-    set_with_dataframe(ws, out, include_index=False, include_column_header=True)
-
-    # Meta timestamp
-    stamp = datetime.now(timezone.utc).astimezone(LOCAL_TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
-    try:
-        try:
-            meta = sh.worksheet(META_SHEET_NAME)
-        except gspread.WorksheetNotFound:
-            meta = sh.add_worksheet(title=META_SHEET_NAME, rows=10, cols=3)
-            meta.update("A1:B1", [["Key", "Value"]])
-            meta.update("A2", [["last_updated"]])
-        meta.update("B2", [[stamp]])
-    except Exception:
-        pass  # don't fail saves if meta update fails
 
-@st.cache_data(ttl=20)
-def read_last_updated_from_meta() -> str | None:
-    """Reads Meta!B2 as the 'last updated' timestamp. Returns None if missing."""
-    try:
-        gc = _gc()
-        sh = gc.open_by_key(SHEET_ID)
-        meta = sh.worksheet(META_SHEET_NAME)
-        val = meta.acell("B2").value
-        return val.strip() if val else None
-    except Exception:
-        return None
-
-# ===== Orders sheet helpers =====
-@st.cache_data(ttl=20)
-def read_orders_sheet() -> pd.DataFrame:
-    gc = _gc()
-    sh = gc.open_by_key(SHEET_ID)
-    try:
-        ws = sh.worksheet(ORDERS_SHEET_NAME)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=ORDERS_SHEET_NAME, rows=1000, cols=9)
-        ws.update(
-            "A1:I1",
-            [["OrderId","OrderName","LineId","SKU","Qty","Completed","CompletedAt","CreatedDate","Note"]]
-        )
-    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
+    # Lower-cased search keys (hidden columns), computed once per fetch instead of on every keystroke
+    df["_item_lc"] = df["Item"].str.lower()
+    df["_sku_lc"] = df["SKU"].str.lower()
+    return df
 
+def _clean_orders(df: pd.DataFrame) -> pd.DataFrame:
     # Normalize columns
-    cols = ["OrderId","OrderName","LineId","SKU","Qty","Completed","CompletedAt","CreatedDate","Note"]
-    for col in cols:
+    for col in ORDERS_COLS:
         if col not in df.columns:
             df[col] = "" if col not in ["Qty","Completed"] else (0 if col == "Qty" else False)
 
-    df = df[cols].dropna(how="all")
+    df = df[ORDERS_COLS].dropna(how="all")
+    for col in ["OrderId","OrderName","LineId","SKU","CompletedAt","CreatedDate","Note"]:
+        df[col] = df[col].fillna("").astype(str)
     df["Qty"] = pd.to_numeric(df["Qty"], errors="coerce").fillna(0).astype(int)
-    df["Completed"] = df["Completed"].astype(str).str.lower().isin(["true","1","yes","y","t"])
-    return df
+    df["Completed"] = df["Completed"].map(TRUTHY).notna()
 
-def write_orders_sheet(df: pd.DataFrame):
-    gc = _gc()
-    sh = gc.open_by_key(SHEET_ID)
-    try:
-        ws = sh.worksheet(ORDERS_SHEET_NAME)
-    except gspread.WorksheetNotFound:
-        ws = sh.add_worksheet(title=ORDERS_SHEET_NAME, rows=1000, cols=9)
-    out = df[["OrderId","OrderName","LineId","SKU","Qty","Completed","CompletedAt","CreatedDate","Note"]].copy()
-    ws.clear()
-    set_with_dataframe(ws, out, include_index=False, include_column_header=True)
-
-# ===== Map sheet helpers (JamlinerLength -> BalanceSize) =====
-@st.cache_data(ttl=60)
-def read_map_sheet() -> pd.DataFrame:
-    gc = _gc()
-    sh = gc.open_by_key(SHEET_ID)
-    try:
-        ws = sh.worksheet(MAP_SHEET_NAME)
-    except gspread.WorksheetNotFound:
-        # bootstrap an empty Map sheet with headers
-        ws = sh.add_worksheet(title=MAP_SHEET_NAME, rows=100, cols=3)
-        ws.update("A1:C1", [["JamlinerLength","BalanceSize","UnitsPerOrder"]])
-    df = get_as_dataframe(ws, evaluate_formulas=True, header=0)
-    for col in ["JamlinerLength","BalanceSize","UnitsPerOrder"]:
+    # Lower-cased search key (OrderName / OrderId / SKU) as a hidden column, computed once per fetch
+    df["_search_lc"] = (df["OrderName"] + "\n" + df["OrderId"] + "\n" + df["SKU"]).str.lower()
+
+    # Sort by CreatedDate once per fetch (unparseable dates last). The hidden _sheet_row
+    # column remembers the sheet's own order so saving Orders doesn't reorder the tab.
+    df["_sheet_row"] = np.arange(len(df))
+    # format="mixed": parse each cell on its own, hand-typed dates don't share one format
+    created = pd.to_datetime(df["CreatedDate"], errors="coerce", format="mixed").to_numpy()
+    return df.iloc[np.argsort(created, kind="stable")]
+
+def _clean_map(df: pd.DataFrame) -> pd.DataFrame:
+    for col in MAP_COLS:
         if col not in df.columns:
             df[col] = "" if col != "UnitsPerOrder" else 1
-    df = df[["JamlinerLength","BalanceSize","UnitsPerOrder"]].dropna(how="all")
+    df = df[MAP_COLS].dropna(how="all")
     df["UnitsPerOrder"] = pd.to_numeric(df["UnitsPerOrder"], errors="coerce").fillna(1).astype(int)
     # Clean strings
     df["JamlinerLength"] = df["JamlinerLength"].astype(str).str.strip()
     df["BalanceSize"] = df["BalanceSize"].astype(str).str.strip()
     return df
 
+INVENTORY_RANGE = _a1(WORKSHEET_NAME, "A:D")
+ORDERS_RANGE = _a1(ORDERS_SHEET_NAME, "A:I")
+MAP_RANGE = _a1(MAP_SHEET_NAME, "A:C")
+META_RANGE = _a1(META_SHEET_NAME, "B2")
+
+@st.cache_data(ttl=30)
+def read_all_sheets(replay: bool = False) -> tuple[pd.DataFrame, pd.DataFrame, pd.DataFrame, str | None]:
+    """
+    Read Inventory, Orders, Map and Meta!B2 with a single values.batchGet call.
+    With RECORD_REPLAY on, every response is also recorded to disk; with replay=True the API is
+    not touched and the recording is rendered instead (FileNotFoundError if there is none).
+    Returns (inventory_df, orders_df, map_df, last_updated).
+    """
+    ranges = [INVENTORY_RANGE, ORDERS_RANGE, MAP_RANGE, META_RANGE]
+    if replay:
+        responses = []
+        for rng in ranges:
+            rows = _recording_get(_recording_key(rng))
+            if rows is None:
+                raise FileNotFoundError(f"Replay mode: no recording of {rng}. Turn Replay off to fetch it.")
+            responses.append(rows)
+    else:
+        # Raw cell values: numbers arrive as numbers, dates stay as their displayed text
+        resp = _call(_sheet().values_batch_get, ranges, params={
+            "valueRenderOption": "UNFORMATTED_VALUE",
+            "dateTimeRenderOption": "FORMATTED_STRING",
+        })
+        responses = [vr.get("values", []) for vr in resp["valueRanges"]]
+        if RECORD_REPLAY:
+            for rng, rows in zip(ranges, responses):
+                _recording_put(_recording_key(rng), rows)
+    inv_rows, orders_rows, map_rows, meta_rows = responses
+
+    val = meta_rows[0][0] if meta_rows and meta_rows[0] else None
+    last_updated = str(val).strip() if val else None
+    return (
+        _clean_inventory(_frame(inv_rows)),
+        _clean_orders(_frame(orders_rows)),
+        _clean_map(_frame(map_rows)),
+        last_updated,
+    )
+
+def write_inventory_sheet(df: pd.DataFrame):
+    """Writes inventory and updates Meta!B2 with timestamp."""
+    sh = _sheet()
+    out = df[INVENTORY_COLS]
+    rows = out.astype(object).where(out.notna(), "").values.tolist()
+    stamp = _now_str()
+
+    # Inventory + Meta timestamp in one values.batchUpdate. USER_ENTERED so values read back as
+    # text (numeric-looking labels, formatted dates) are parsed like typed input, not stored as text
+    _call(sh.values_batch_update, {
+        "valueInputOption": "USER_ENTERED",
+        "data": [
+            {"range": _a1(WORKSHEET_NAME, "A1"), "values": [INVENTORY_COLS, *rows]},
+            {"range": _a1(META_SHEET_NAME, "A1:B2"), "values": [["Key", "Value"], ["last_updated", stamp]]},
+        ],
+    })
+    # Values are overwritten in place, so clear whatever was below the new last row
+    _call(sh.values_clear, _a1(WORKSHEET_NAME, f"A{len(rows) + 2}:D"))
+
+    # Only the tabs we just rewrote are now out of date on disk
+    if RECORD_REPLAY:
+        _recording_drop(_recording_key(INVENTORY_RANGE))
+        _recording_drop(_recording_key(META_RANGE))
+
+    # Publish the read-only snapshot
+    if SNAPSHOT_BUCKET:
+        try:
+            snap = out.copy()
+            snap.attrs = {"last_updated": stamp}
+            _snapshot_bucket().blob(SNAPSHOT_BLOB).upload_from_string(
+                snap.to_parquet(index=False), content_type="application/vnd.apache.parquet")
+        except Exception:
+            # Don't fail the save, but don't leave the previous snapshot to be served as current:
+            # remove it so read_inventory_for_view falls back to Sheets
+            try:
+                _snapshot_bucket().blob(SNAPSHOT_BLOB).delete()
+            except Exception:
+                pass
+            # Callers rerun straight after saving, so the page shows the warning on the next run
+            st.session_state.snapshot_failed = True
+
+# ===== Read-only inventory snapshot (GCS) =====
+@st.cache_resource
+def _snapshot_bucket():
+    # Cache the bucket, not a Blob: a Blob remembers the generation it last saw
+    client = storage.Client.from_service_account_info(st.secrets["gcp_service_account"])
+    return client.bucket(SNAPSHOT_BUCKET)
+
+@st.cache_data(ttl=30)
+def read_inventory_snapshot() -> tuple[pd.DataFrame, str | None] | None:
+    """
+    Read the inventory snapshot published by write_inventory_sheet: one GCS GET, no Sheets quota.
+    Returns (inventory_df, last_updated), or None if there is no usable snapshot (missing,
+    unreadable, or older than SNAPSHOT_MAX_AGE).
+    """
+    try:
+        snap = pd.read_parquet(io.BytesIO(_snapshot_bucket().blob(SNAPSHOT_BLOB).download_as_bytes()))
+        last_updated = snap.attrs["last_updated"]
+        age = datetime.now(LOCAL_TZ) - datetime.fromisoformat(last_updated)
+    except Exception:
+        return None  # nothing published yet, or bucket unreachable: read Sheets instead
+    if age.total_seconds() > SNAPSHOT_MAX_AGE:
+        return None
+    return _clean_inventory(snap), last_updated
+
+def read_inventory_for_view(replay: bool = False) -> tuple[pd.DataFrame, str | None]:
+    """Inventory + last_updated for the read-only view: the snapshot when there is one, else Sheets."""
+    if SNAPSHOT_BUCKET and not replay:
+        snap = read_inventory_snapshot()
+        if snap is not None:
+            return snap
+    inv_df, _, _, last_updated = read_all_sheets(replay=replay)
+    return inv_df, last_updated
+
+def write_orders_sheet(df: pd.DataFrame):
+    sh = _sheet()
+    # Write rows back in the sheet's own order, not the CreatedDate display order
+    if "_sheet_row" in df.columns:
+        df = df.sort_values("_sheet_row", kind="stable")
+    out = df[ORDERS_COLS]
+    body = [ORDERS_COLS, *out.astype(object).where(out.notna(), "").values.tolist()]
+    # USER_ENTERED: dates come back from the read as formatted text and must be re-parsed as dates
+    _call(sh.values_update, _a1(ORDERS_SHEET_NAME, f"A1:I{len(body)}"),
+          params={"valueInputOption": "USER_ENTERED"}, body={"values": body})
+    # Values are overwritten in place, so clear whatever was below the new last row
+    _call(sh.values_clear, _a1(ORDERS_SHEET_NAME, f"A{len(body) + 1}:I"))
+    if RECORD_REPLAY:
+        _recording_drop(_recording_key(ORDERS_RANGE))
+
 def apply_completions_update_inventory(orders_before: pd.DataFrame,
                                        orders_after: pd.DataFrame,
                                        inventory_df: pd.DataFrame,
@@ -167,74 +370,53 @@ def apply_completions_update_inventory(orders_before: pd.DataFrame,
     """
     # Inventory index by BalanceSize (Item column)
     inv_key = "Item"  # Balance Size is tracked in 'Item'
-    inv = inventory_df.set_index(inv_key).copy()
+    inv = inventory_df.set_index(inv_key)
 
     # Build lookup from JamlinerLength (SKU) -> (BalanceSize, UnitsPerOrder)
     m = map_df.dropna(subset=["JamlinerLength","BalanceSize"]).copy()
     m["JamlinerLength"] = m["JamlinerLength"].astype(str).str.strip()
     m["BalanceSize"] = m["BalanceSize"].astype(str).str.strip()
-    map_lookup = {
-        row["JamlinerLength"]: (row["BalanceSize"], int(row["UnitsPerOrder"]))
-        for _, row in m.iterrows()
-    }
-
-    # Detect newly-completed lines
-    before = orders_before.set_index("LineId")
-    after  = orders_after.set_index("LineId")
-
-    changed = []
-    for line_id in after.index:
-        was = bool(before.loc[line_id, "Completed"]) if line_id in before.index else False
-        now = bool(after.loc[line_id, "Completed"])
-        if (not was) and now:
-            changed.append(line_id)
-
-    # Apply decrements
-    for line_id in changed:
-        jamliner = str(after.loc[line_id, "SKU"]).strip()  # SKU column is the Jamliner Length (product you make)
-        qty      = int(after.loc[line_id, "Qty"] or 0)
-        if qty <= 0:
-            continue
-
-        if jamliner not in map_lookup:
-            st.warning(f"No Map entry for JamlinerLength '{jamliner}'. Skipping decrement for line {line_id}.")
-            continue
-
-        balance_size, units_per = map_lookup[jamliner]
-        total_consume = qty * max(units_per, 1)
-
-        if balance_size not in inv.index:
-            st.warning(f"Balance Size '{balance_size}' not found in Inventory. Skipping decrement for line {line_id}.")
-            continue
-
-        cur = int(inv.loc[balance_size, "OnHand"])
-        inv.loc[balance_size, "OnHand"] = cur - total_consume
+    map_lookup = dict(zip(
+        m["JamlinerLength"].values,
+        zip(m["BalanceSize"].values, m["UnitsPerOrder"].astype(int).values),
+    ))
+
+    # Detect newly-completed lines (False -> True)
+    was_done = dict(zip(orders_before["LineId"], orders_before["Completed"].astype(bool)))
+    was = orders_after["LineId"].map(was_done).eq(True)
+    changed = orders_after[orders_after["Completed"].astype(bool) & ~was]
+
+    lines = pd.DataFrame({
+        "LineId": changed["LineId"],
+        "Jamliner": changed["SKU"].astype(str).str.strip(),  # SKU column is the Jamliner Length (product you make)
+        "Qty": pd.to_numeric(changed["Qty"], errors="coerce").fillna(0).astype(int),
+    })
+    lines = lines[lines["Qty"] > 0]
+
+    # Resolve BalanceSize / UnitsPerOrder for every line at once
+    mapped = lines["Jamliner"].map(map_lookup)
+    for line_id, jamliner in zip(lines.loc[mapped.isna(), "LineId"], lines.loc[mapped.isna(), "Jamliner"]):
+        st.warning(f"No Map entry for JamlinerLength '{jamliner}'. Skipping decrement for line {line_id}.")
+    lines = lines[mapped.notna()]
+    lines[["BalanceSize", "UnitsPerOrder"]] = pd.DataFrame(
+        mapped.dropna().tolist(), index=lines.index, columns=["BalanceSize", "UnitsPerOrder"]
+    )
+
+    unknown = ~lines["BalanceSize"].isin(inv.index)
+    for line_id, balance_size in zip(lines.loc[unknown, "LineId"], lines.loc[unknown, "BalanceSize"]):
+        st.warning(f"Balance Size '{balance_size}' not found in Inventory. Skipping decrement for line {line_id}.")
+    lines = lines[~unknown]
+
+    # Apply decrements: one grouped sum per BalanceSize
+    consume = lines["Qty"] * lines["UnitsPerOrder"].clip(lower=1)
+    decr = consume.groupby(lines["BalanceSize"]).sum()
+    inv["OnHand"] = (inv["OnHand"] - decr.reindex(inv.index, fill_value=0)).astype(int)
 
     # Recompute LowStock flag
     out = inv.reset_index()
     out["LowStock"] = out["OnHand"] <= out["MinLevel"]
     return out
 
-# =========================
-# Load initial data
-# =========================
-df = read_inventory_sheet()
-orders_df = read_orders_sheet()
-map_df = read_map_sheet()
-last_updated = read_last_updated_from_meta()
-last_fetched = datetime.now(timezone.utc).astimezone(LOCAL_TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
-
-# =========================
-# Top bar: timestamps
-# =========================
-c1, c2, c3 = st.columns([1.6, 1, 1])
-with c1:
-    st.caption(f"**Last updated (from sheet)**: {last_updated if last_updated else '—'}")
-with c2:
-    st.caption(f"**Last fetched**: {last_fetched}")
-with c3:
-    st.caption("Auto-refresh ~30s")
-
 # =========================
 # Sidebar
 # =========================
@@ -269,14 +451,111 @@ with st.sidebar.expander(" Editor unlock"):
                 st.session_state.can_edit = False
                 st.rerun()
 
+# Replay mode: render the recorded responses, no API calls and no saving
+if RECORD_REPLAY:
+    st.sidebar.toggle("Replay recorded data", key="replay",
+                      help="Demo without touching the Google Sheets API. Read-only; errors if nothing is recorded yet.")
+
+# =========================
+# Load initial data
+# =========================
+replay = RECORD_REPLAY and st.session_state.get("replay", False)
+# The read-only Inventory page refreshes on its own (inventory_table below)
+read_only_inventory = page == "Inventory" and not st.session_state.can_edit
+try:
+    if read_only_inventory:
+        # Read-only inventory needs neither Orders nor Map, and can come from the snapshot
+        df, last_updated = read_inventory_for_view(replay)
+        orders_df = map_df = None
+    else:
+        df, orders_df, map_df, last_updated = read_all_sheets(replay=replay)
+except FileNotFoundError as e:
+    st.error(str(e))
+    st.stop()
+if replay:
+    st.info("Replay mode: showing recorded data. Saving is disabled.")
+if st.session_state.pop("snapshot_failed", False):
+    st.warning("Saved to Google Sheets, but the read-only snapshot could not be published. "
+               "Manager view will read from Sheets until the next successful save.")
+
+# =========================
+# Top bar: timestamps (drawn by inventory_table on the read-only Inventory page)
+# =========================
+if not read_only_inventory:
+    c1, c2, _ = st.columns([1.6, 1, 1])
+    with c1:
+        st.caption(f"**Last updated (from sheet)**: {last_updated if last_updated else '—'}")
+    with c2:
+        st.caption(f"**Last fetched**: {_now_str()}")
+
 # =========================
 # KPI (only Low Stock Items)
 # =========================
-st.metric("Low Stock Items", int(df["LowStock"].sum()))
+if not read_only_inventory:
+    st.metric("Low Stock Items", int(df["LowStock"].sum()))
 
 # =========================
 # INVENTORY PAGE
 # =========================
+def _filter_inventory(inv_df: pd.DataFrame, show_only_low: bool, q_inv: str) -> pd.DataFrame:
+    filtered = inv_df
+    if q_inv:
+        ql = q_inv.lower()
+        mask = (
+            inv_df["_item_lc"].str.contains(ql, regex=False)
+            | inv_df["_sku_lc"].str.contains(ql, regex=False)
+        )
+        filtered = inv_df[mask]
+    if show_only_low:
+        filtered = filtered[filtered["LowStock"]]
+    return filtered
+
+def merge_inventory_edits(inv_df: pd.DataFrame, edited: pd.DataFrame) -> pd.DataFrame:
+    """Fold OnHand/MinLevel from the editor back into inv_df by SKU (or Item if SKU isn't unique)."""
+    key = "SKU" if inv_df["SKU"].is_unique else "Item"
+    incoming = edited[[key, "OnHand", "MinLevel"]].drop_duplicates(key, keep="last")
+    out_df = inv_df.merge(incoming.rename(columns={"OnHand": "_o", "MinLevel": "_m"}), on=key, how="left")
+    out_df["OnHand"] = out_df["_o"].fillna(out_df["OnHand"]).astype(int)
+    out_df["MinLevel"] = out_df["_m"].fillna(out_df["MinLevel"]).astype(int)
+    return out_df.drop(columns=["_o", "_m"])
+
+@st.fragment(run_every=30)
+def inventory_table(show_only_low: bool, q_inv: str):
+    """
+    Manager (read-only) view: timestamps, Low Stock KPI and table.
+    Re-runs on its own every 30s; the rest of the page is left alone.
+    """
+    inv_df, inv_updated = read_inventory_for_view(replay=replay)
+    filtered = _filter_inventory(inv_df, show_only_low, q_inv)
+
+    c1, c2, c3 = st.columns([1.6, 1, 1])
+    with c1:
+        st.caption(f"**Last updated (from sheet)**: {inv_updated if inv_updated else '—'}")
+    with c2:
+        st.caption(f"**Last fetched**: {_now_str()}")
+    with c3:
+        if SNAPSHOT_BUCKET:
+            st.caption(f"Auto-refreshes every 30s. Edits made directly in the sheet can take "
+                       f"up to {SNAPSHOT_MAX_AGE // 60} min to show.")
+        else:
+            st.caption("Auto-refreshes every 30s")
+    st.metric("Low Stock Items", int(inv_df["LowStock"].sum()))
+
+    # Rename headers for display
+    status = np.where(filtered["OnHand"].values <= filtered["MinLevel"].values, "⚠️ Low", "✅ OK")
+    view = filtered.assign(Status=status).rename(columns={
+        "Item": "Balance Size",
+        "SKU": "Jamliner Length",
+        "OnHand": "Current Stock",
+        "MinLevel": "Reorder Level",
+    })
+    st.dataframe(
+        view[["Balance Size", "Jamliner Length", "Current Stock", "Reorder Level", "Status"]],
+        use_container_width=True,
+        hide_index=True,
+        height=_full_height(len(view)) 
+    )
+
 if page == "Inventory":
     st.subheader("Inventory")
 
@@ -284,36 +563,13 @@ if page == "Inventory":
         show_only_low = st.checkbox("Show only low-stock items", value=False)
         q_inv = st.text_input("Search by Balance Size or Jamliner Length")
 
-    filtered = df.copy()
-    if show_only_low:
-        filtered = filtered[filtered["LowStock"]]
-    if q_inv:
-        mask = (
-            filtered["Item"].str.contains(q_inv, case=False, na=False)
-            | filtered["SKU"].str.contains(q_inv, case=False, na=False)
-        )
-        filtered = filtered[mask]
-
     cols = ["Item", "SKU", "OnHand", "MinLevel"]
 
     if not st.session_state.can_edit:
-        # Manager (read-only) view — rename headers for display
-        view = filtered.copy()
-        view["Status"] = view.apply(lambda r: "⚠️ Low" if r["OnHand"] <= r["MinLevel"] else "✅ OK", axis=1)
-        view = view.rename(columns={
-            "Item": "Balance Size",
-            "SKU": "Jamliner Length",
-            "OnHand": "Current Stock",
-            "MinLevel": "Reorder Level",
-        })
-        st.dataframe(
-            view[["Balance Size", "Jamliner Length", "Current Stock", "Reorder Level", "Status"]],
-            use_container_width=True,
-            hide_index=True,
-            height=_full_height(len(view)) 
-        )
+        inventory_table(show_only_low, q_inv)
     else:
         # Editor view — editable table with friendly labels
+        filtered = _filter_inventory(df, show_only_low, q_inv)
         edited = st.data_editor(
             filtered[cols],
             num_rows="dynamic",
@@ -326,31 +582,58 @@ if page == "Inventory":
                 "MinLevel": st.column_config.NumberColumn("Reorder Level", format="%d"),
             },
         )
-        # Merge edits back into df by SKU (or Item if not unique)
-        key = "SKU" if df["SKU"].is_unique else "Item"
-        merged = df.set_index(key).copy()
-        incoming = edited.set_index(key)[["OnHand", "MinLevel"]]
-        merged.update(incoming)
-        out_df = merged.reset_index()
+        out_df = merge_inventory_edits(df, edited)
 
         cA, cB = st.columns([1, 1])
         with cA:
-            if st.button("💾 Save changes to Google Sheet"):
+            if st.button("💾 Save changes to Google Sheet", disabled=replay):
                 try:
                     write_inventory_sheet(out_df)
                     st.success("Inventory saved.")
-                    st.cache_data.clear()
+                    read_all_sheets.clear()
+                    read_inventory_snapshot.clear()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Save failed: {e}")
         with cB:
             if st.button("🔄 Reload"):
-                st.cache_data.clear()
+                read_all_sheets.clear()
                 st.rerun()
 
 # =========================
 # ORDERS PAGE
 # =========================
+PICK_COLS = ["OrderName","OrderId","LineId","SKU","Qty","BalanceSize","UnitsPerOrder"]
+
+def pick_frame(open_lines: pd.DataFrame, checks: set, seed: dict) -> pd.DataFrame:
+    """
+    Data for the simple-mode pick list. Pick is seeded from `checks` only when the lines shown
+    change, so ticking doesn't change the editor's data (and with it the widget id and its edits).
+    """
+    shown = open_lines[PICK_COLS]
+    sig = int(pd.util.hash_pandas_object(shown, index=False).sum())
+    if seed.get("sig") != sig:
+        seed["sig"] = sig
+        seed["pick"] = shown["LineId"].astype(str).isin(checks).tolist()
+    return shown.assign(Pick=seed["pick"])[["Pick", *PICK_COLS]]
+
+def fold_pick_edits(checks: set, line_ids: list[str], edited_rows: dict) -> set:
+    """Apply the editor's edited_rows (row position -> changed cells) to the set of ticked LineIds."""
+    checks = set(checks)
+    for pos, change in edited_rows.items():
+        if "Pick" in change:
+            line_id = line_ids[int(pos)]
+            if change["Pick"]:
+                checks.add(line_id)
+            else:
+                checks.discard(line_id)
+    return checks
+
+def _on_pick_change(line_ids: list[str]):
+    st.session_state.complete_checks = fold_pick_edits(
+        st.session_state.complete_checks, line_ids, st.session_state.pick_editor["edited_rows"]
+    )
+
 if page == "Orders":
     st.subheader("Orders (complete to decrement inventory)")
 
@@ -360,17 +643,13 @@ if page == "Orders":
         q_orders = st.text_input("Search Order Name / Id / Jamliner Length")
         simple_mode = st.toggle("Simple checkbox mode", value=True, help="Tick boxes like a to-do list. Turn off to edit rows in a table.")
 
-    # Start from full orders df
-    view_orders = orders_df.copy()
+    # Start from full orders df, already in CreatedDate order (sorted by the reader);
+    # filtering keeps that order, so no per-rerun sort is needed
+    view_orders = orders_df
+    if q_orders:
+        view_orders = orders_df[orders_df["_search_lc"].str.contains(q_orders.lower(), regex=False)]
     if show_only_open:
         view_orders = view_orders[~view_orders["Completed"]]
-    if q_orders:
-        mask = (
-            view_orders["OrderName"].astype(str).str.contains(q_orders, case=False, na=False)
-            | view_orders["OrderId"].astype(str).str.contains(q_orders, case=False, na=False)
-            | view_orders["SKU"].astype(str).str.contains(q_orders, case=False, na=False)
-        )
-        view_orders = view_orders[mask]
 
     # Merge mapping to show BalanceSize & UnitsPerOrder next to each line (display only)
     map_lookup_df = map_df.rename(columns={"JamlinerLength": "SKU"})
@@ -379,10 +658,6 @@ if page == "Orders":
         on="SKU", how="left"
     )
 
-    # Sort by CreatedDate if present
-    if "CreatedDate" in view_orders.columns:
-        view_orders = view_orders.sort_values(by="CreatedDate", ascending=True, na_position="last")
-
     # ---------- SIMPLE CHECKBOX MODE ----------
     if simple_mode:
         st.caption("Tick ✅ for each line you completed. Then click the button below to update inventory.")
@@ -392,47 +667,46 @@ if page == "Orders":
         if open_lines.empty:
             st.success("No open lines. ")
         else:
-            # Build a checkbox list
-            # Store checked states in session so re-renders don't lose choices
+            # Ticked LineIds live in session state (folded in by _on_pick_change) so they survive
+            # search/filter changes, which rebuild the editor (and reset its own state)
             if "complete_checks" not in st.session_state:
-                st.session_state.complete_checks = {}
-
-            # Render checkboxes
-            for _, row in open_lines.iterrows():
-                lid = str(row["LineId"])
-                label = f"**{row['OrderName']}** ({row['OrderId']}) — Jamliner: **{row['SKU']}** × **{int(row['Qty'])}**"
-                # Show mapped balance info if available
-                if pd.notna(row.get("BalanceSize")):
-                    label += f"  →  Balance: **{row['BalanceSize']}** (Units/Order: {int(row.get('UnitsPerOrder') or 1)})"
-                st.session_state.complete_checks[lid] = st.checkbox(
-                    label,
-                    key=f"chk_{lid}",
-                    value=st.session_state.complete_checks.get(lid, False)
-                )
+                st.session_state.complete_checks = set()
+            picks = pick_frame(open_lines, st.session_state.complete_checks,
+                               st.session_state.setdefault("pick_seed", {}))
+
+            # One editable table instead of a checkbox widget per line
+            st.data_editor(
+                picks,
+                disabled=PICK_COLS,
+                hide_index=True,
+                use_container_width=True,
+                key="pick_editor",
+                on_change=_on_pick_change,
+                args=(picks["LineId"].astype(str).tolist(),),
+                column_config={
+                    "Pick": st.column_config.CheckboxColumn("Done"),
+                    "LineId": None,
+                    "SKU": "Jamliner Length",
+                    "Qty": st.column_config.NumberColumn("Qty", format="%d"),
+                    "BalanceSize": "Balance Size (mapped)",
+                    "UnitsPerOrder": st.column_config.NumberColumn("Units/Order", format="%d"),
+                },
+            )
+            checked_ids = st.session_state.complete_checks
 
             # Apply selected completions
-            if st.button("✅ Mark selected complete & update inventory"):
+            if st.button("✅ Mark selected complete & update inventory", disabled=replay):
                 # Build 'after' dataframe by flipping Completed for checked line IDs
-                before_df = orders_df.copy()
+                before_df = orders_df
                 after_df = orders_df.copy()
-                now_str = datetime.now(timezone.utc).astimezone(LOCAL_TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
-
-                any_checked = False
-                for lid, checked in st.session_state.complete_checks.items():
-                    if not checked:
-                        continue
-                    any_checked = True
-                    # Set Completed True and stamp CompletedAt (if not already)
-                    row_idx = after_df.index[after_df["LineId"].astype(str) == lid]
-                    if len(row_idx):
-                        idx = row_idx[0]
-                        # Only flip if it wasn't completed before
-                        if not bool(before_df.at[idx, "Completed"]):
-                            after_df.at[idx, "Completed"] = True
-                            if not str(after_df.at[idx, "CompletedAt"] or "").strip():
-                                after_df.at[idx, "CompletedAt"] = now_str
-
-                if not any_checked:
+                now_str = _now_str()
+
+                # Only flip lines that weren't completed before; stamp CompletedAt if blank
+                mask = after_df["LineId"].astype(str).isin(checked_ids) & ~after_df["Completed"]
+                after_df.loc[mask, "Completed"] = True
+                after_df.loc[mask & (after_df["CompletedAt"].str.strip() == ""), "CompletedAt"] = now_str
+
+                if not checked_ids:
                     st.info("Select at least one line to complete.")
                 else:
                     try:
@@ -441,9 +715,12 @@ if page == "Orders":
                         write_inventory_sheet(updated_inventory)
                         write_orders_sheet(after_df)
                         st.success("Saved. Inventory updated and selected lines marked completed.")
-                        # Reset checkboxes for next session
-                        st.session_state.complete_checks = {}
-                        st.cache_data.clear()
+                        # Reset ticks so they don't carry over onto the reloaded lines
+                        st.session_state.complete_checks = set()
+                        st.session_state.pop("pick_editor", None)
+                        st.session_state.pop("pick_seed", None)
+                        read_all_sheets.clear()
+                        read_inventory_snapshot.clear()
                         st.rerun()
                     except Exception as e:
                         st.error(f"Save failed: {e}")
@@ -475,28 +752,30 @@ if page == "Orders":
         merged_orders = base.reset_index()
 
         # Timestamp newly completed lines
-        now_str = datetime.now(timezone.utc).astimezone(LOCAL_TZ).strftime("%Y-%m-%d %H:%M:%S %Z")
+        now_str = _now_str()
         before_map = orders_df.set_index("LineId")["Completed"].to_dict()
-        for idx, row in merged_orders.iterrows():
-            lid = row["LineId"]
-            prev = bool(before_map.get(lid, False))
-            cur = bool(row["Completed"])
-            if (not prev) and cur and (not str(row.get("CompletedAt","")).strip()):
-                merged_orders.at[idx, "CompletedAt"] = now_str
+        prev = merged_orders["LineId"].map(before_map).eq(True)
+        mask = (
+            merged_orders["Completed"].astype(bool)
+            & ~prev
+            & (merged_orders["CompletedAt"].fillna("").astype(str).str.strip() == "")
+        )
+        merged_orders.loc[mask, "CompletedAt"] = now_str
 
         c1, c2 = st.columns([1, 1])
         with c1:
-            if st.button(" Save Orders & Update Inventory"):
+            if st.button(" Save Orders & Update Inventory", disabled=replay):
                 try:
                     updated_inventory = apply_completions_update_inventory(orders_df, merged_orders, df, map_df)
                     write_inventory_sheet(updated_inventory)
                     write_orders_sheet(merged_orders)
                     st.success("Saved. Inventory updated and Orders marked completed.")
-                    st.cache_data.clear()
+                    read_all_sheets.clear()
+                    read_inventory_snapshot.clear()
                     st.rerun()
                 except Exception as e:
                     st.error(f"Save failed: {e}")
         with c2:
             if st.button(" Reload Orders"):
-                st.cache_data.clear()
+                read_all_sheets.clear()
                 st.rerun()
@@ -0,0 +1,28 @@
+"""Load pure helpers out of app.py without running the Streamlit script.
+
+app.py reads secrets and draws the page at import, so the named top-level functions and
+constants are pulled out of its source and executed on their own.
+"""
+import ast
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+APP = Path(__file__).resolve().parents[1] / "app.py"
+
+
+def load_helpers(names: set[str], **ns) -> dict:
+    """Exec the top-level defs/assignments of app.py named in `names`; `ns` seeds the globals."""
+    tree = ast.parse(APP.read_text(encoding="utf-8"))
+    nodes = []
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name in names:
+            nodes.append(node)
+        elif isinstance(node, ast.Assign) and any(
+            isinstance(t, ast.Name) and t.id in names for t in node.targets
+        ):
+            nodes.append(node)
+    ns = {"pd": pd, "np": np, **ns}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(APP), "exec"), ns)
+    return ns
@@ -0,0 +1,98 @@
+"""Inventory decrements applied when order lines are marked complete."""
+from types import SimpleNamespace
+
+import pandas as pd
+import pytest
+
+from _app_source import load_helpers
+
+NAMES = {"INVENTORY_COLS", "MAP_COLS", "_frame", "_clean_inventory", "_clean_map",
+         "apply_completions_update_inventory"}
+
+
+@pytest.fixture
+def app():
+    warnings = []
+    h = load_helpers(NAMES, st=SimpleNamespace(warning=warnings.append))
+    h["warnings"] = warnings
+    return h
+
+
+def _inventory(h):
+    return h["_clean_inventory"](h["_frame"]([
+        ["Item", "SKU", "OnHand", "MinLevel"],
+        ["Bal 10", "J-36", 20, 5],
+        ["Bal 12", "J-48", 10, 4],
+    ]))
+
+
+def _map(h):
+    return h["_clean_map"](h["_frame"]([
+        ["JamlinerLength", "BalanceSize", "UnitsPerOrder"],
+        ["36", "Bal 10", 2],
+        ["48", "Bal 12", ""],
+        ["60", "Bal 99", 1],
+    ]))
+
+
+def _orders(*lines):
+    """lines: (LineId, SKU, Qty, Completed)"""
+    return pd.DataFrame(lines, columns=["LineId", "SKU", "Qty", "Completed"])
+
+
+def _on_hand(out):
+    return dict(zip(out["Item"], out["OnHand"]))
+
+
+def test_newly_completed_line_decrements_mapped_balance_size(app):
+    before = _orders(("L1", "36", 3, False), ("L2", "48", 1, False))
+    after = _orders(("L1", "36", 3, True), ("L2", "48", 1, False))
+
+    out = app["apply_completions_update_inventory"](before, after, _inventory(app), _map(app))
+
+    assert _on_hand(out) == {"Bal 10": 14, "Bal 12": 10}  # 3 orders x 2 units
+    assert out["OnHand"].dtype.kind == "i"
+    assert app["warnings"] == []
+
+
+def test_already_completed_line_is_not_decremented_again(app):
+    before = _orders(("L1", "36", 3, True), ("L2", "48", 2, False))
+    after = _orders(("L1", "36", 3, True), ("L2", "48", 2, True))
+
+    out = app["apply_completions_update_inventory"](before, after, _inventory(app), _map(app))
+
+    # only L2 counts; a blank UnitsPerOrder means 1
+    assert _on_hand(out) == {"Bal 10": 20, "Bal 12": 8}
+
+
+def test_unmapped_sku_is_skipped_with_a_warning(app):
+    before = _orders(("L1", "72", 1, False), ("L2", "36", 1, False))
+    after = _orders(("L1", "72", 1, True), ("L2", "36", 1, True))
+
+    out = app["apply_completions_update_inventory"](before, after, _inventory(app), _map(app))
+
+    assert _on_hand(out) == {"Bal 10": 18, "Bal 12": 10}
+    assert len(app["warnings"]) == 1
+    assert "'72'" in app["warnings"][0] and "L1" in app["warnings"][0]
+
+
+def test_unknown_balance_size_is_skipped_with_a_warning(app):
+    before = _orders(("L1", "60", 1, False))
+    after = _orders(("L1", "60", 1, True))
+
+    out = app["apply_completions_update_inventory"](before, after, _inventory(app), _map(app))
+
+    assert _on_hand(out) == {"Bal 10": 20, "Bal 12": 10}
+    assert len(app["warnings"]) == 1
+    assert "'Bal 99'" in app["warnings"][0] and "L1" in app["warnings"][0]
+
+
+def test_lines_without_a_positive_qty_are_ignored(app):
+    before = _orders(("L1", "36", 0, False), ("L2", "48", -2, False), ("L3", "72", 0, False))
+    after = _orders(("L1", "36", 0, True), ("L2", "48", -2, True), ("L3", "72", 0, True))
+
+    out = app["apply_completions_update_inventory"](before, after, _inventory(app), _map(app))
+
+    assert _on_hand(out) == {"Bal 10": 20, "Bal 12": 10}
+    assert app["warnings"] == []  # not even the unmapped one
+    assert out["LowStock"].tolist() == [False, False]
@@ -0,0 +1,20 @@
+"""Orders come back from the reader sorted by CreatedDate."""
+from _app_source import load_helpers
+
+H = load_helpers({"ORDERS_COLS", "TRUTHY", "_frame", "_clean_orders"})
+
+
+def test_orders_sort_by_created_date_across_date_formats():
+    header = H["ORDERS_COLS"]
+    rows = [header] + [
+        ["O1", "A", "L1", "36", 1, "", "", "2024-05-03", ""],
+        ["O2", "B", "L2", "36", 1, "", "", "5/1/2024", ""],
+        ["O3", "C", "L3", "36", 1, "TRUE", "", "not a date", ""],
+        ["O4", "D", "L4", "36", 1, "", "", "May 2, 2024 9:30", ""],
+    ]
+
+    out = H["_clean_orders"](H["_frame"](rows))
+
+    assert out["LineId"].tolist() == ["L2", "L4", "L1", "L3"]
+    assert out["_sheet_row"].tolist() == [1, 3, 0, 2]
+    assert out["Completed"].tolist() == [False, False, False, True]
@@ -0,0 +1,41 @@
+"""Exercise the inventory editor save path without a Streamlit runtime."""
+import pandas as pd
+
+from _app_source import load_helpers
+
+H = load_helpers({"INVENTORY_COLS", "_frame", "_clean_inventory", "_filter_inventory", "merge_inventory_edits"})
+
+
+def _inventory():
+    rows = [
+        ["Item", "SKU", "OnHand", "MinLevel"],
+        ["Bal 10", "J-36", 12, 5],
+        ["Bal 12", "J-48", 3, 4],
+        ["Bal 14", "J-60", "7", ""],
+    ]
+    return H["_clean_inventory"](H["_frame"](rows))
+
+
+def test_editor_merge_applies_edits_from_filtered_view():
+    df = _inventory()
+    # st.data_editor hands back a copy of what it was given
+    edited = H["_filter_inventory"](df, False, "j-4")[H["INVENTORY_COLS"]].copy()
+    edited.loc[:, "OnHand"] = 9
+
+    out = H["merge_inventory_edits"](df, edited)
+
+    assert out["OnHand"].tolist() == [12, 9, 7]
+    assert out["MinLevel"].tolist() == [5, 4, 0]
+    assert out["OnHand"].dtype.kind == "i"
+
+
+def test_editor_merge_keeps_stored_value_for_blank_cells_and_last_duplicate_wins():
+    df = _inventory()
+    edited = df[H["INVENTORY_COLS"]].copy()
+    edited["OnHand"] = [None, 1.0, 2.0]
+    edited = pd.concat([edited, edited.iloc[[2]].assign(OnHand=20.0)])
+
+    out = H["merge_inventory_edits"](df, edited)
+
+    assert out["OnHand"].tolist() == [12, 1, 20]
+    assert len(out) == len(df)
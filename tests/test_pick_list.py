@@ -0,0 +1,45 @@
+"""Simple-mode pick list: ticks are collected across reruns of the data editor."""
+import pandas as pd
+
+from _app_source import load_helpers
+
+H = load_helpers({"PICK_COLS", "pick_frame", "fold_pick_edits"})
+
+
+def _open_lines(*line_ids):
+    return pd.DataFrame({
+        "OrderName": [f"Order {i}" for i in line_ids],
+        "OrderId": [f"O-{i}" for i in line_ids],
+        "LineId": list(line_ids),
+        "SKU": ["36"] * len(line_ids),
+        "Qty": [1] * len(line_ids),
+        "BalanceSize": ["Bal 10"] * len(line_ids),
+        "UnitsPerOrder": [2.0] * len(line_ids),
+    })
+
+
+def test_two_ticks_in_a_row_are_both_kept():
+    lines, seed, checks = _open_lines("L1", "L2", "L3"), {}, set()
+
+    # run 1: editor shows nothing ticked; user ticks L1 (on_change sees edited_rows)
+    first = H["pick_frame"](lines, checks, seed)
+    ids = first["LineId"].tolist()
+    checks = H["fold_pick_edits"](checks, ids, {0: {"Pick": True}})
+
+    # run 2: the editor must get identical data, otherwise its id changes and the L1 edit is lost
+    second = H["pick_frame"](lines, checks, seed)
+    pd.testing.assert_frame_equal(first, second)
+    checks = H["fold_pick_edits"](checks, ids, {0: {"Pick": True}, 2: {"Pick": True}})
+
+    assert checks == {"L1", "L3"}
+
+
+def test_untick_and_filter_change_reseed_from_checks():
+    lines, seed = _open_lines("L1", "L2", "L3"), {}
+    ids = H["pick_frame"](lines, set(), seed)["LineId"].tolist()
+    checks = H["fold_pick_edits"]({"L1", "L3"}, ids, {2: {"Pick": False}, 1: {"Pick": True}})
+    assert checks == {"L1", "L2"}
+
+    # a search narrows the list: the new editor starts from what was ticked
+    narrowed = H["pick_frame"](lines[lines["LineId"] != "L1"], checks, seed)
+    assert narrowed[["LineId", "Pick"]].values.tolist() == [["L2", True], ["L3", False]]